@@ -25,32 +25,45 @@ Options:
     --dry-run               Show what would be changed without making changes
     --backup                Create backups of modified files (.bak extension)
     --genre GENRE           Only process files in folders matching this genre
-    --batch-size N          Process files in batches of N (default: 1000)
+    --trust-folder          Skip a folder when a sample of its files is already tagged correctly
+    --batch-size N          Maximum files from one folder handed to a worker at a time (default: 64)
     --verbose               Show more detailed output
     --log-file PATH         Path to log file (default: genre_tagging.log)
+    --cache-file PATH       Path to resume cache (default: genre_tagging_cache.json)
+    --no-cache              Check every file, ignoring and not updating the resume cache
 """
 
 import os
 import sys
 import logging
+import logging.handlers
 import traceback
 import argparse
+import json
 import shutil
 import re
+import random
 from datetime import datetime
-from pathlib import Path
-from functools import partial
-from multiprocessing import Pool, cpu_count
-from typing import Dict, Tuple, List, Optional, Callable, Any, Union, Generator
+from functools import partial, lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import Queue, cpu_count, get_all_start_methods, get_context
+from typing import Dict, Tuple, List, Optional, Callable, Any, Union, Generator, Iterable, Set
+try:
+    import fcntl  # For reflink backups; not available on Windows
+except ImportError:
+    fcntl = None
 try:
     from tqdm import tqdm
     TQDM_AVAILABLE = True
 except ImportError:
     TQDM_AVAILABLE = False
-    print("tqdm not available. Install with: pip install tqdm")
+    if __name__ == "__main__":  # Not again when worker processes import this module
+        print("tqdm not available. Install with: pip install tqdm")
 
 import mutagen
 from mutagen.easyid3 import EasyID3
+from mutagen.id3 import ID3NoHeaderError
 from mutagen.mp3 import MP3
 from mutagen.flac import FLAC
 from mutagen.mp4 import MP4
@@ -74,41 +87,65 @@ from mutagen.dsdiff import DSDIFF
 # Default paths
 DEFAULT_MUSIC_BASE = "/srv/dev-disk-by-uuid-c8158ed6-b7f4-4aab-9958-b0f3002b01aa/Media/Audio/Music/Sources"
 
+# Worker processes are replaced after roughly this many files to keep memory bounded
+WORKER_MAX_FILES = 500
+
+# Folder chunks queued per worker process, so the scanner stays a little ahead
+TASKS_PER_WORKER = 4
+
+# ioctl request to clone a file's extents (linux/fs.h FICLONE)
+FICLONE = 0x40049409
+
+# Bytes of each file's header to ask the kernel to read ahead before tagging
+HEADER_PREFETCH_BYTES = 64 * 1024
+
+# Threads used to list directories while scanning (stat calls release the GIL)
+SCAN_THREADS = 16
+
+# Resume cache entry per file path: (mtime_ns, size, genre) when last verified correct
+CacheEntry = Tuple[int, int, str]
+
+# Files checked per folder with --trust-folder before trusting the rest
+TRUST_SAMPLE_SIZE = 3
+
 # Supported extensions (all Mutagen-supported audio formats)
-AUDIO_EXTS = {
+AUDIO_EXTS = frozenset({
     ".mp3", ".flac", ".mp4", ".m4a", ".m4b", ".aac", ".ogg", ".opus", ".oga", ".mpc", ".ape",
     ".wv", ".tta", ".wma", ".aiff", ".aif", ".wav", ".ofr", ".ofs", ".tak", ".dsf",
     ".dff", ".au", ".mp2", ".acm"
-}
+})
 
 # Format handlers for genre tags
-# Each entry: (AudioClass, tag_key, current_value_getter, new_value_setter)
+# Each entry: (AudioClass, tag_key)
 FORMAT_HANDLERS = {
-    ".flac": (FLAC, "genre", lambda a, g: g, lambda a, g: [g]),
-    ".mp3": (EasyID3, "genre", lambda a, g: g, lambda a, g: g),
-    ".mp4": (MP4, "\xa9gen", lambda a, g: g, lambda a, g: [g]),
-    ".m4a": (MP4, "\xa9gen", lambda a, g: g, lambda a, g: [g]),
-    ".m4b": (MP4, "\xa9gen", lambda a, g: g, lambda a, g: [g]),
-    ".aac": (MP4, "\xa9gen", lambda a, g: g, lambda a, g: [g]),
-    ".ogg": (OggVorbis, "genre", lambda a, g: g, lambda a, g: [g]),
-    ".opus": (OggOpus, "genre", lambda a, g: g, lambda a, g: [g]),
-    ".oga": (OggFLAC, "genre", lambda a, g: g, lambda a, g: [g]),
-    ".mpc": (Musepack, "genre", lambda a, g: g, lambda a, g: [g]),
-    ".ape": (MonkeysAudio, "genre", lambda a, g: g, lambda a, g: [g]),
-    ".wv": (WavPack, "genre", lambda a, g: g, lambda a, g: [g]),
-    ".tta": (TrueAudio, "genre", lambda a, g: g, lambda a, g: [g]),
-    ".wma": (ASF, "WM/Genre", lambda a, g: g, lambda a, g: [g]),
-    ".aiff": (AIFF, "TCON", lambda a, g: g, lambda a, g: [g]),
-    ".aif": (AIFF, "TCON", lambda a, g: g, lambda a, g: [g]),
-    ".wav": (WAVE, "TCON", lambda a, g: g, lambda a, g: [g]),
-    ".ofr": (OptimFROG, "genre", lambda a, g: g, lambda a, g: [g]),
-    ".ofs": (OptimFROG, "genre", lambda a, g: g, lambda a, g: [g]),
-    ".tak": (TAK, "genre", lambda a, g: g, lambda a, g: [g]),
-    ".dsf": (DSF, "TCON", lambda a, g: g, lambda a, g: [g]),
-    ".dff": (DSDIFF, "TCON", lambda a, g: g, lambda a, g: [g]),
-    ".mp2": (EasyID3, "genre", lambda a, g: g, lambda a, g: g),
+    ".flac": (FLAC, "genre"),
+    ".mp3": (EasyID3, "genre"),
+    ".mp4": (MP4, "\xa9gen"),
+    ".m4a": (MP4, "\xa9gen"),
+    ".m4b": (MP4, "\xa9gen"),
+    ".aac": (MP4, "\xa9gen"),
+    ".ogg": (OggVorbis, "genre"),
+    ".opus": (OggOpus, "genre"),
+    ".oga": (OggFLAC, "genre"),
+    ".mpc": (Musepack, "genre"),
+    ".ape": (MonkeysAudio, "genre"),
+    ".wv": (WavPack, "genre"),
+    ".tta": (TrueAudio, "genre"),
+    ".wma": (ASF, "WM/Genre"),
+    ".aiff": (AIFF, "TCON"),
+    ".aif": (AIFF, "TCON"),
+    ".wav": (WAVE, "TCON"),
+    ".ofr": (OptimFROG, "genre"),
+    ".ofs": (OptimFROG, "genre"),
+    ".tak": (TAK, "genre"),
+    ".dsf": (DSF, "TCON"),
+    ".dff": (DSDIFF, "TCON"),
+    ".mp2": (EasyID3, "genre"),
 }
 
+# Formats whose genre is written as a one-element list; EasyID3 takes a plain string
+NEEDS_LIST = frozenset(FORMAT_HANDLERS) - {".mp3", ".mp2"}
+
 # ----------- UTILITY FUNCTIONS ------------
 
 def setup_logging(log_file: str, verbose: bool = False) -> None:
@@ -123,6 +160,16 @@ def setup_logging(log_file: str, verbose: bool = False) -> None:
         ]
     )
 
+def start_log_listener(log_queue: Queue) -> logging.handlers.QueueListener:
+    """
+    Return a started QueueListener on log_queue, writing records sent by
+    worker processes (see _init_worker) through the root handlers on one thread.
+    """
+    listener = logging.handlers.QueueListener(log_queue, *logging.getLogger().handlers,
+                                              respect_handler_level=True)
+    listener.start()
+    return listener
+
 def parse_arguments() -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Update audio file genre tags based on folder structure")
@@ -136,9 +183,15 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument("--dry-run", action="store_true", help="Show changes without modifying files")
     parser.add_argument("--backup", action="store_true", help="Create backups of modified files")
     parser.add_argument("--genre", type=str, help="Only process files in folders matching this genre")
-    parser.add_argument("--batch-size", type=int, default=1000, help="Process files in batches of N (default: 1000)")
+    parser.add_argument("--trust-folder", action="store_true",
+                        help=f"Skip a folder when {TRUST_SAMPLE_SIZE} sampled files already have the correct genre")
+    parser.add_argument("--batch-size", type=int, default=64,
+                        help="Maximum files from one folder handed to a worker at a time (default: 64)")
     parser.add_argument("--verbose", action="store_true", help="Show more detailed output")
     parser.add_argument("--log-file", type=str, default="genre_tagging.log", help="Path to log file")
+    parser.add_argument("--cache-file", type=str, default="genre_tagging_cache.json",
+                        help="Path to resume cache of files already tagged correctly")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the resume cache and check every file")
 
     args = parser.parse_args()
 
@@ -150,189 +203,690 @@ def parse_arguments() -> argparse.Namespace:
 
     return args
 
-def normalize_genre(genre: str) -> str:
-    """Normalize genre names for consistency."""
-    # Remove leading/trailing whitespace
-    genre = genre.strip()
-
-    # Capitalize first letter of each word, but preserve specific capitalizations
-    words_to_preserve = {'DJ', 'MC', 'UK', 'US', 'R&B', 'A&R', 'EDM', 'IDM', 'DnB', 'D&B',
-                        'J-Pop', 'K-Pop', 'EMD'}
-
-    result = []
-    for word in genre.split():
-        if word.upper() in words_to_preserve:
-            result.append(word.upper())
-        else:
-            result.append(word.capitalize())
+# Words with a fixed capitalization, keyed by their lowercase form
+PRESERVED_WORDS = {word.lower(): word for word in (
+    'DJ', 'MC', 'UK', 'US', 'R&B', 'A&R', 'EDM', 'IDM', 'DnB', 'D&B', 'J-Pop', 'K-Pop', 'EMD'
+)}
 
-    return ' '.join(result)
+@lru_cache(maxsize=1024)
+def normalize_genre(genre: str) -> str:
+    """
+    Normalize genre names for consistency.
+    Cached: a library only has a few hundred distinct genre folders.
+    """
+    # Capitalize first letter of each word, but preserve specific capitalizations.
+    # split() also drops leading/trailing and repeated whitespace.
+    return ' '.join(PRESERVED_WORDS.get(word.lower()) or word.capitalize() for word in genre.split())
 
-def get_genre_from_path(path: Path, base_folder: str) -> Optional[str]:
+def get_genre_from_path(path: str, base_folder: str) -> Optional[str]:
     """
-    Extract genre folder name from file path, based on known structure.
-    Example: /base/Managed/Rock - Goth/Joy Division/.../track.flac -> "Rock - Goth"
+    Extract genre folder name from a directory path, based on known structure.
+    Example: /base/Managed/Rock - Goth/Joy Division/Closer -> "Rock - Goth"
+    Returns None for base_folder itself, which has no genre folder.
     """
     try:
-        parts = path.relative_to(base_folder).parts
-        if not parts:
+        if not path.startswith(base_folder):
+            raise ValueError(f"not under {base_folder}")
+        relative = path[len(base_folder):].lstrip(os.sep)
+        if not relative:
             return None
-        genre = parts[0]
+        genre = relative.split(os.sep, 1)[0]
         return normalize_genre(genre)
     except Exception as e:
         logging.error(f"Failed to get genre from path {path}: {e}")
         return None
 
-def backup_file(file_path: Path) -> bool:
+def copy_file(src: str, dst: str) -> None:
+    """
+    Copy src to a new file dst with metadata, like shutil.copy2, but as
+    cheaply as the filesystem allows:
+    1. FICLONE reflink (Btrfs, XFS, ...): O(1), shares extents copy-on-write
+    2. os.copy_file_range: in-kernel copy with no userspace buffers
+    3. a plain buffered copy everywhere else
+    dst is created exclusively (O_EXCL), so FileExistsError is raised if it
+    already exists; existence is checked and the file created in one call.
+    A hardlink is not an option: mutagen rewrites tags in place, so a linked
+    "backup" would change along with the original.
+    """
+    with open(src, "rb") as fsrc, open(dst, "xb") as fdst:
+        try:
+            try:
+                if fcntl is None:
+                    raise OSError("reflink not supported")
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            except OSError:
+                try:
+                    remaining = os.fstat(fsrc.fileno()).st_size
+                    while remaining > 0:
+                        copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                        if copied == 0:
+                            break
+                        remaining -= copied
+                except (OSError, AttributeError):
+                    # e.g. cross-filesystem on older kernels; start over portably
+                    fsrc.seek(0)
+                    fdst.seek(0)
+                    fdst.truncate()
+                    shutil.copyfileobj(fsrc, fdst)
+        except BaseException:
+            # Don't leave a partial copy for a later run to mistake for a backup
+            fdst.close()
+            os.unlink(dst)
+            raise
+    shutil.copystat(src, dst)
+
+def backup_file(file_path: str) -> bool:
     """Create a backup of the file with .bak extension."""
     try:
-        backup_path = str(file_path) + ".bak"
-        if not os.path.exists(backup_path):
-            shutil.copy2(file_path, backup_path)
+        copy_file(file_path, file_path + ".bak")
         return True
+    except FileExistsError:
+        return True  # Backed up on an earlier run; keep that copy
     except Exception as e:
         logging.error(f"Failed to create backup of {file_path}: {e}")
         return False
 
-def set_genre_tag(file_path: Path, genre: str, dry_run: bool = False, make_backup: bool = False) -> bool:
+def load_genre_cache(cache_file: str) -> Dict[str, CacheEntry]:
+    """Load the resume cache written by a previous run; empty if missing or unreadable."""
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            return {path: tuple(entry) for path, entry in json.load(f).items()}
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable cache file {cache_file}: {e}")
+        return {}
+
+def save_genre_cache(cache_file: str, cache: Dict[str, CacheEntry]) -> None:
+    """Write the resume cache atomically, so an interrupted save never leaves it truncated."""
+    try:
+        tmp_path = cache_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_file)
+    except Exception as e:
+        logging.error(f"Failed to save cache file {cache_file}: {e}")
+
+def prune_genre_cache(cache: Dict[str, CacheEntry], seen_paths: Set[str], directories: List[str]) -> int:
     """
-    Set the genre metadata tag for a given audio file.
-    Returns True if file was updated, False otherwise.
+    Drop entries for files that are gone, after a complete scan of directories
+    that found seen_paths: anything under a scanned directory that the scan
+    didn't see, and anything outside all of them. Entries under a directory
+    that doesn't exist right now (e.g. an unmounted drive) are kept.
+    Returns the number of entries removed.
     """
-    ext = file_path.suffix.lower()
+    roots = tuple(os.path.join(d, "") for d in directories)
+    scanned = tuple(root for root in roots if os.path.isdir(root))
+    stale = [path for path in cache
+             if path not in seen_paths and (path.startswith(scanned) or not path.startswith(roots))]
+    for path in stale:
+        del cache[path]
+    return len(stale)
+
+def get_current_genre(audio: Any, tag_key: str) -> Optional[str]:
+    """Get current genre value from an opened mutagen object based on format."""
+    if hasattr(audio, "get"):
+        return audio.get(tag_key, [None])[0]
+    elif hasattr(audio, "tags") and audio.tags:
+        return audio.tags.get(tag_key, [None])[0]
+    return None
+
+def _quick_read_flac_genre(f: Any) -> Optional[str]:
+    """First GENRE value in a FLAC file's Vorbis comment block, walking the metadata block headers."""
+    if f.read(4) != b"fLaC":
+        return None  # e.g. a leading ID3 tag; left to mutagen
+    while True:
+        header = f.read(4)
+        if len(header) < 4:
+            return None
+        block_type = header[0] & 0x7F
+        length = int.from_bytes(header[1:4], "big")
+        if block_type == 4:  # VORBIS_COMMENT
+            data = f.read(length)
+            pos = 4 + int.from_bytes(data[0:4], "little")  # Skip vendor string
+            count = int.from_bytes(data[pos:pos + 4], "little")
+            pos += 4
+            for _ in range(count):
+                comment_length = int.from_bytes(data[pos:pos + 4], "little")
+                pos += 4
+                key, sep, value = data[pos:pos + comment_length].partition(b"=")
+                pos += comment_length
+                if sep and key.upper() == b"GENRE":
+                    return value.decode("utf-8")
+            return None
+        if header[0] & 0x80:  # Last metadata block
+            return None
+        f.seek(length, os.SEEK_CUR)
+
+def _find_mp4_atom(f: Any, name: bytes, start: int, end: int) -> Optional[Tuple[int, int]]:
+    """Find a child atom between start and end, returning its (data start, end) offsets."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        size = int.from_bytes(header[0:4], "big")
+        header_size = 8
+        if size == 1:  # 64-bit size follows the name
+            size = int.from_bytes(f.read(8), "big")
+            header_size = 16
+        elif size == 0:  # Extends to the end of the parent
+            size = end - pos
+        if size < header_size:
+            return None
+        if header[4:8] == name:
+            return pos + header_size, pos + size
+        pos += size
+    return None
+
+def _quick_read_mp4_genre(f: Any) -> Optional[str]:
+    """First text value of the \xa9gen atom under moov.udta.meta.ilst, or None if absent."""
+    span = (0, os.fstat(f.fileno()).st_size)
+    for name in (b"moov", b"udta", b"meta", b"ilst", b"\xa9gen", b"data"):
+        span = _find_mp4_atom(f, name, *span)
+        if span is None:
+            return None
+        if name == b"meta":
+            span = (span[0] + 4, span[1])  # meta is a full box: skip version and flags
+    start, end = span
+    f.seek(start)
+    data = f.read(end - start)
+    if len(data) < 8 or int.from_bytes(data[1:4], "big") != 1:  # Not UTF-8 text
+        return None
+    return data[8:].decode("utf-8")  # After type/flags and locale
+
+# Raw genre readers for formats where the common "already correct" check can
+# skip building a full mutagen object
+QUICK_GENRE_READERS = {
+    ".flac": _quick_read_flac_genre,
+    ".mp4": _quick_read_mp4_genre,
+    ".m4a": _quick_read_mp4_genre,
+    ".m4b": _quick_read_mp4_genre,
+    ".aac": _quick_read_mp4_genre,
+}
 
+def quick_read_genre(file_path: str, ext: str) -> Optional[str]:
+    """
+    Read the current genre by scanning the raw tag structures (FLAC and MP4
+    only). Returns None whenever the value can't be found cheaply; callers
+    then fall back to mutagen.
+    """
+    reader = QUICK_GENRE_READERS.get(ext)
+    if reader is None:
+        return None
+    try:
+        with open(file_path, "rb") as f:
+            return reader(f)
+    except Exception:
+        return None
+
+def read_genre_tag(file_path: str, ext: str) -> Optional[str]:
+    """Read the current genre tag without modifying the file. Returns None if unset or unreadable."""
+    if ext not in FORMAT_HANDLERS:
+        return None
+    current_genre = quick_read_genre(file_path, ext)
+    if current_genre is not None:
+        return current_genre
+    AudioClass, tag_key = FORMAT_HANDLERS[ext]
+    try:
+        return get_current_genre(AudioClass(file_path), tag_key)
+    except Exception:
+        return None
+
+def set_genre_tag(file_path: str, ext: str, genre: str, dry_run: bool = False,
+                  make_backup: bool = False) -> Optional[bool]:
+    """
+    Set the genre metadata tag for a given audio file.
+    ext is the file's lowercased extension, as produced by the scanner.
+    Returns True if file was updated, False if it was already correct,
+    None if it could not be tagged.
+    """
     # Skip unsupported formats
     if ext not in FORMAT_HANDLERS:
         if ext in {".au", ".acm"}:
             logging.warning(f"{ext} format: genre tagging not supported for {file_path}")
         else:
             logging.warning(f"Unsupported audio file type for tagging: {file_path}")
+        return None
+
+    # Fast path for the common case: the raw scan already finds the right genre
+    if quick_read_genre(file_path, ext) == genre:
         return False
 
-    AudioClass, tag_key, getter, setter = FORMAT_HANDLERS[ext]
+    AudioClass, tag_key = FORMAT_HANDLERS[ext]
 
-    try:
-        # Special case for MP3
-        if ext == ".mp3":
-            try:
-                audio = AudioClass(str(file_path))
-            except Exception:
+    # Two attempts: if the first hits a PermissionError, fix the file mode and
+    # retry. A file that was already read and modified only needs the save retried.
+    audio = None
+    for attempt in range(2):
+        try:
+            if audio is None:
+                try:
+                    audio = AudioClass(file_path)
+                except ID3NoHeaderError:
+                    # Untagged: make sure it really is MPEG audio (MP3 raises
+                    # if it can't sync to a frame) before starting an empty
+                    # ID3 tag in memory, written out by the save below
+                    MP3(file_path)
+                    audio = EasyID3()
+                    audio.filename = file_path
+
+                current_genre = get_current_genre(audio, tag_key)
+
+                # Skip if already correct
+                if current_genre == genre:
+                    return False
+
+                # In dry run mode, just report the would-be change
                 if dry_run:
-                    return True  # Would need to add tags
-                audiofile = MP3(str(file_path))
-                audiofile.add_tags()
-                audiofile.save()
-                audio = AudioClass(str(file_path))
-        else:
-            audio = AudioClass(str(file_path))
-
-        # Get current genre value based on format
-        current_genre = None
-        if hasattr(audio, "get"):
-            current_tag = audio.get(tag_key, [None])[0]
-            current_genre = getter(audio, current_tag)
-        elif hasattr(audio, "tags") and audio.tags:
-            current_tag = audio.tags.get(tag_key, [None])[0]
-            current_genre = getter(audio, current_tag)
-
-        # Skip if already correct
-        if current_genre == genre:
-            return False
-
-        # In dry run mode, just report the would-be change
-        if dry_run:
-            logging.info(f"Would update genre: {file_path} - '{current_genre}' → '{genre}'")
-            return True
+                    logging.info(f"Would update genre: {file_path} - '{current_genre}' → '{genre}'")
+                    return True
 
-        # Create backup if requested
-        if make_backup:
-            backup_file(file_path)
+                # Create backup if requested
+                if make_backup:
+                    backup_file(file_path)
 
-        # Set genre tag appropriately for the format
-        if hasattr(audio, "tags"):
-            audio.tags[tag_key] = setter(audio, genre)
-        else:
-            audio[tag_key] = setter(audio, genre)
-
-        audio.save()
-        return True
+                # Set genre tag appropriately for the format
+                new_value = [genre] if ext in NEEDS_LIST else genre
+                if hasattr(audio, "tags"):
+                    audio.tags[tag_key] = new_value
+                else:
+                    audio[tag_key] = new_value
 
-    except PermissionError:
-        # Try to fix permissions and retry
-        if dry_run:
-            logging.info(f"Would fix permissions on: {file_path}")
+            audio.save()
             return True
 
+        except PermissionError as perm_e:
+            if dry_run:
+                logging.info(f"Would fix permissions on: {file_path}")
+                return True
+            if attempt:
+                logging.error(f"Permission error on {file_path}: {perm_e}")
+                return None
+
+            # Try to fix permissions and retry
+            try:
+                os.chmod(file_path, 0o664)  # rw-rw-r--
+            except Exception as chmod_e:
+                logging.error(f"Permission error on {file_path}: {chmod_e}")
+                return None
+        except Exception as e:
+            logging.error(f"Error updating {file_path}: {e}")
+            logging.debug(traceback.format_exc())
+            return None
+
+    return None
+
+def prefetch_headers(file_paths: List[str], length: int = HEADER_PREFETCH_BYTES) -> None:
+    """
+    Ask the kernel to start reading the first `length` bytes of each file in
+    the background, so header reads for a whole folder chunk are in flight
+    at once instead of one blocking read per file. No-op where
+    posix_fadvise is unavailable.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for file_path in file_paths:
         try:
-            os.chmod(file_path, 0o664)  # rw-rw-r--
-            return set_genre_tag(file_path, genre, dry_run, make_backup)
-        except Exception as perm_e:
-            logging.error(f"Permission error on {file_path}: {perm_e}")
-            return False
+            fd = os.open(file_path, os.O_RDONLY)
+        except OSError:
+            continue  # Reported properly when the file is tagged
+        try:
+            os.posix_fadvise(fd, 0, length, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+# Run-wide settings, identical for every file; set once per worker by _init_worker
+_dry_run = False
+_make_backup = False
+_trust_folder = False
+_use_cache = False
+
+def _init_worker(log_queue: Queue, verbose: bool, dry_run: bool, make_backup: bool, trust_folder: bool,
+                 use_cache: bool) -> None:
+    """
+    Process pool initializer: runs once in each worker process.
+    Routes logging to the parent's QueueListener and stores the run-wide
+    settings so tasks only need to carry file paths.
+    """
+    global _dry_run, _make_backup, _trust_folder, _use_cache
+
+    # Workers only enqueue records; formatting and file writes happen on the
+    # parent's listener thread. Debug calls return early unless --verbose.
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.DEBUG if verbose else logging.INFO)
+
+    _dry_run = dry_run
+    _make_backup = make_backup
+    _trust_folder = trust_folder
+    _use_cache = use_cache
+
+def process_file(file_path: str, genre: Optional[str]) -> Tuple[str, str, Optional[CacheEntry]]:
+    """
+    Tag a single file, never raising.
+    Returns (path, result, cache entry); the cache entry is set when the file
+    is known to carry the right genre and the resume cache is enabled.
+    """
+    try:
+        return _process_file(file_path, genre)
     except Exception as e:
-        logging.error(f"Error updating {file_path}: {e}")
+        # Never let one bad file take down the worker and its whole chunk
         logging.debug(traceback.format_exc())
-        return False
+        return (file_path, f"Worker error: {e}", None)
 
-def process_file(args: Tuple[Path, str, bool, bool, Optional[str]]) -> Tuple[str, str]:
-    """Worker for multiprocessing pool."""
-    file_path, base_folder, dry_run, make_backup, filter_genre = args
-
-    genre = get_genre_from_path(file_path, base_folder)
+def _process_file(file_path: str, genre: Optional[str]) -> Tuple[str, str, Optional[CacheEntry]]:
+    """Tag a single file using the worker's run-wide settings; called by process_file."""
     if not genre:
-        return (str(file_path), "Genre not found")
+        return (file_path, "Genre not found", None)
+
+    ext = file_path[file_path.rfind('.'):].lower()
+    updated = set_genre_tag(file_path, ext, genre, _dry_run, _make_backup)
 
-    # Apply genre filter if specified
-    if filter_genre and filter_genre.lower() not in genre.lower():
-        return (str(file_path), "Skipped (genre filter)")
+    cache_entry = None
+    if _use_cache and (updated is False or (updated and not _dry_run)):
+        st = os.stat(file_path)  # After any save, which changes mtime and size
+        cache_entry = (st.st_mtime_ns, st.st_size, genre)
 
-    updated = set_genre_tag(file_path, genre, dry_run, make_backup)
     if updated:
-        return (str(file_path), f"Genre set to '{genre}'")
+        return (file_path, f"Genre set to '{genre}'", cache_entry)
+    elif updated is False:
+        return (file_path, "Already correct", cache_entry)
     else:
-        return (str(file_path), "Already correct or failed")
-
-def find_audio_files(root_folder: str) -> Generator[Path, None, None]:
-    """Recursively yield all supported audio files under root_folder."""
-    for dirpath, _, filenames in os.walk(root_folder):
-        for fname in filenames:
-            ext = os.path.splitext(fname)[1].lower()
-            if ext in AUDIO_EXTS:
-                yield Path(os.path.join(dirpath, fname))
-
-def process_files_in_batches(files_and_args: List[Tuple], batch_size: int, num_workers: int) -> None:
-    """Process files in batches to manage memory usage."""
-    total_files = len(files_and_args)
-    logging.info(f"Processing {total_files} audio files in batches of {batch_size}...")
-
-    # Set up progress bar if tqdm is available
+        return (file_path, "Failed", None)
+
+def process_folder(task: Tuple[Optional[str], List[str]]
+                   ) -> Tuple[Optional[str], List[Tuple[str, str, Optional[CacheEntry]]]]:
+    """
+    Worker for the process pool: task is (genre, file_paths) for files
+    that all live in one directory, with the genre resolved by the scanner.
+    Returns the genre along with the per-file results.
+    Headers are prefetched for the whole chunk before tagging. With
+    --trust-folder, a random sample is checked first; if every sampled file
+    already has the right genre, the rest are skipped without being opened.
+    """
+    genre, file_paths = task
+    if _trust_folder:
+        try:
+            if genre and len(file_paths) > TRUST_SAMPLE_SIZE:
+                sample = random.sample(file_paths, TRUST_SAMPLE_SIZE)
+                prefetch_headers(sample)
+                if all(read_genre_tag(p, p[p.rfind('.'):].lower()) == genre for p in sample):
+                    return genre, [(p, "Skipped (trusted folder)", None) for p in file_paths]
+        except Exception:
+            # Fall back to checking every file individually
+            logging.debug(traceback.format_exc())
+
+    prefetch_headers(file_paths)
+    return genre, [process_file(p, genre) for p in file_paths]
+
+def scan_dir(path: str, with_stat: bool = False) -> Tuple[List[str], List[Tuple[str, str, Optional[Tuple[int, int]]]]]:
+    """
+    List a single directory, returning (subdirectories, audio files).
+    Audio files are (path, lowercased extension, (mtime_ns, size)) tuples,
+    ordered by inode number so workers visit them roughly in on-disk order.
+    (mtime_ns, size) is only filled in with with_stat, otherwise None.
+    """
+    subdirs = []
+    audio_files = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    # Slice from the last dot rather than os.path.splitext; dot > 0
+                    # skips extensionless names and dotfiles like splitext does
+                    name = entry.name
+                    dot = name.rfind('.')
+                    if dot > 0:
+                        ext = name[dot:].lower()
+                        if ext in AUDIO_EXTS:
+                            signature = None
+                            if with_stat:
+                                try:
+                                    st = entry.stat()
+                                    signature = (st.st_mtime_ns, st.st_size)
+                                except OSError:
+                                    pass  # Left to the worker, which reports the error
+                            audio_files.append((entry.inode(), entry.path, ext, signature))
+    except OSError as e:
+        logging.warning(f"Cannot read directory {path}: {e}")
+    # Directory listing order is hash order on most filesystems; inode order
+    # tracks allocation order far better and keeps readahead effective
+    audio_files.sort()
+    return subdirs, [(fpath, ext, signature) for _, fpath, ext, signature in audio_files]
+
+def walk_audio_dirs(root_folder: str, with_stat: bool = False
+                    ) -> Generator[Tuple[str, List[Tuple[str, str, Optional[Tuple[int, int]]]]], None, None]:
+    """
+    Walk root_folder with a pool of scanner threads, yielding
+    (directory, audio files) for every directory that contains audio files,
+    with audio files as returned by scan_dir.
+    Directories are yielded as soon as they are listed, in no particular order.
+    """
+    with ThreadPoolExecutor(max_workers=SCAN_THREADS) as executor:
+        pending = {executor.submit(scan_dir, root_folder, with_stat): root_folder}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dirpath = pending.pop(future)
+                subdirs, audio_files = future.result()
+                for subdir in subdirs:
+                    pending[executor.submit(scan_dir, subdir, with_stat)] = subdir
+                if audio_files:
+                    yield dirpath, audio_files
+
+def iter_audio_folders(directories: List[str], batch_size: int, filter_genre: Optional[str] = None,
+                       genre_cache: Optional[Dict[str, CacheEntry]] = None, seen_paths: Optional[Set[str]] = None
+                       ) -> Generator[Tuple[Optional[str], List[str], List[str]], None, None]:
+    """
+    Yield (genre, audio file paths, cached file paths) for each folder under
+    the given directories, with the files to tag split into chunks of at most
+    batch_size. The genre is worked out once per folder here, so workers
+    never derive it per file.
+    Folders whose genre doesn't match filter_genre are dropped here, and files
+    unchanged since genre_cache recorded them with this genre are listed as
+    cached instead; neither is ever sent to the workers or opened.
+    Every audio file found, filtered or not, is added to seen_paths if given.
+    """
+    filter_lower = filter_genre.lower() if filter_genre else None
+    for base_folder in directories:
+        if not os.path.isdir(base_folder):
+            logging.warning(f"Directory not found, skipping: {base_folder}")
+            continue
+
+        logging.info(f"Scanning {base_folder} ...")
+        for dirpath, audio_files in walk_audio_dirs(base_folder, genre_cache is not None):
+            genre = get_genre_from_path(dirpath, base_folder)
+            if seen_paths is not None:
+                seen_paths.update(fpath for fpath, _, _ in audio_files)
+
+            # Apply genre filter if specified
+            if filter_lower and genre and filter_lower not in genre.lower():
+                logging.debug(f"{dirpath}: Skipped (genre filter)")
+                continue
+
+            # Unchanged since it was last verified: the scanner's stat replaces the tag parse
+            file_paths = []
+            cached = []
+            for fpath, _, signature in audio_files:
+                if genre and signature and genre_cache.get(fpath) == (*signature, genre):
+                    cached.append(fpath)
+                else:
+                    file_paths.append(fpath)
+
+            yield genre, file_paths[:batch_size], cached
+            for i in range(batch_size, len(file_paths), batch_size):
+                yield genre, file_paths[i:i + batch_size], []
+
+def start_worker_pool(num_workers: int,
+                      worker_settings: Tuple) -> Tuple[ProcessPoolExecutor, logging.handlers.QueueListener]:
+    """
+    Start a worker process pool, along with the log listener its workers
+    write to. forkserver is used where available, so pools started to
+    recycle workers fork from a process that has already imported mutagen
+    instead of starting from scratch.
+    """
+    context = get_context("forkserver" if "forkserver" in get_all_start_methods() else "spawn")
+    log_listener = start_log_listener(context.Queue(-1))
+    executor = ProcessPoolExecutor(num_workers, mp_context=context, initializer=_init_worker,
+                                   initargs=(log_listener.queue, *worker_settings))
+    return executor, log_listener
+
+def process_files_in_batches(folders: Iterable[Tuple[Optional[str], List[str], List[str]]], worker_settings: Tuple, batch_size: int,
+                             num_workers: int, genre_cache: Optional[Dict[str, CacheEntry]] = None) -> int:
+    """
+    Stream folder chunks through a worker process pool. folders may be a lazy
+    iterable of (genre, files to tag, cached files), as from
+    iter_audio_folders; tagging starts as soon as the first files are discovered.
+    worker_settings are the _init_worker arguments after the log queue.
+    Verified files are recorded in genre_cache, if given. A per-genre summary
+    is logged at the end.
+    If a worker process dies outright (e.g. a native crash on a corrupt file),
+    the chunks it took down are rerun one at a time on a new pool, and only a
+    chunk that crashes again is reported as failed.
+    Returns the number of files processed.
+    """
+    logging.info(f"Processing audio files in chunks of {batch_size}...")
+    total_files = 0
+    # genre -> [updated, unchanged, problems]
+    genre_stats: Dict[str, List[int]] = {}
+
+    # Set up progress bar if tqdm is available (total is unknown while scanning)
     if TQDM_AVAILABLE:
-        pbar = tqdm(total=total_files, desc="Tagging files")
-
-    # Process in batches
-    for i in range(0, total_files, batch_size):
-        batch = files_and_args[i:i+batch_size]
-
-        with Pool(num_workers) as pool:
-            results = pool.map(process_file, batch)
-
-            for fpath, result in results:
-                if "Genre set to" in result:
-                    logging.info(f"{fpath}: {result}")
-                elif "Already correct" in result:
-                    logging.debug(f"{fpath}: {result}")
-                elif "Skipped" in result:
-                    logging.debug(f"{fpath}: {result}")
+        pbar = tqdm(desc="Tagging files")
+
+    # Settings shared by every file go through the initializer, so each task
+    # pickles down to the folder's genre and a list of path strings. The pool
+    # is restarted after about WORKER_MAX_FILES files per worker to keep
+    # memory bounded (ProcessPoolExecutor's max_tasks_per_child can stall
+    # once every worker has retired, and needs Python 3.11).
+    recycle_after = num_workers * WORKER_MAX_FILES
+    folders = iter(folders)
+    executor, log_listener = start_worker_pool(num_workers, worker_settings)
+    submitted = 0  # Files sent to the current pool
+    pending = {}
+    try:
+        while True:
+            # (genre, per-file results) for each finished chunk
+            completed = []
+
+            # Keep a few chunks queued per worker; the scanner runs only that far
+            # ahead. Files the scanner found in the resume cache never reach a worker.
+            max_pending = num_workers * TASKS_PER_WORKER
+            while len(pending) < max_pending and len(completed) < max_pending and submitted < recycle_after:
+                task = next(folders, None)
+                if task is None:
+                    break
+                genre, file_paths, cached = task
+                if cached:
+                    completed.append((genre, [(p, "Skipped (cached)", None) for p in cached]))
+                if file_paths:
+                    pending[executor.submit(process_folder, (genre, file_paths))] = (genre, file_paths)
+                    submitted += len(file_paths)
+            if not pending and not completed:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                # A worker died outright (e.g. a native crash on a corrupt
+                # file) and every chunk in flight failed with it. Rerun those
+                # one at a time on a fresh pool to single out the culprit.
+                logging.error("A worker process crashed; rechecking the folders it was working on")
+                # Once the pool has shut down every future is settled; chunks
+                # that finished before the crash keep their results
+                executor.shutdown(wait=True)
+                finished = []
+                suspects = []
+                for future, task in pending.items():
+                    if isinstance(future.exception(), BrokenProcessPool):
+                        suspects.append(task)
+                    else:
+                        finished.append((task, future))
+                pending.clear()
+
+                # The dead worker may have been killed mid-record, leaving the
+                # log queue wedged; each new pool gets a queue of its own
+                executor, log_listener = start_worker_pool(num_workers, worker_settings)
+                submitted = 0
+                for task in suspects:
+                    future = executor.submit(process_folder, task)
+                    submitted += len(task[1])
+                    wait([future])
+                    finished.append((task, future))
+                    if isinstance(future.exception(), BrokenProcessPool):
+                        executor.shutdown(wait=True)
+                        executor, log_listener = start_worker_pool(num_workers, worker_settings)
+                        submitted = 0
+            else:
+                finished = [(pending.pop(future), future) for future in done]
+
+            for (genre, file_paths), future in finished:
+                error = future.exception()
+                if error is None:
+                    completed.append(future.result())
                 else:
-                    logging.warning(f"{fpath}: {result}")
+                    result = "Worker crashed" if isinstance(error, BrokenProcessPool) else f"Worker error: {error}"
+                    logging.error(f"{os.path.dirname(file_paths[0])}: {result} ({len(file_paths)} files)")
+                    completed.append((genre, [(p, result, None) for p in file_paths]))
+
+            for genre, folder_results in completed:
+                stats = genre_stats.setdefault(genre or "(no genre)", [0, 0, 0])
+                for fpath, result, cache_entry in folder_results:
+                    if cache_entry and genre_cache is not None:
+                        genre_cache[fpath] = cache_entry
+
+                    if "Genre set to" in result:
+                        logging.info(f"{fpath}: {result}")
+                        stats[0] += 1
+                    elif "Already correct" in result:
+                        logging.debug(f"{fpath}: {result}")
+                        stats[1] += 1
+                    elif "Skipped" in result:
+                        logging.debug(f"{fpath}: {result}")
+                        stats[1] += 1
+                    else:
+                        logging.warning(f"{fpath}: {result}")
+                        stats[2] += 1
+                total_files += len(folder_results)
 
                 # Update progress bar
                 if TQDM_AVAILABLE:
-                    pbar.update(1)
-
-    # Close progress bar
-    if TQDM_AVAILABLE:
-        pbar.close()
+                    pbar.update(len(folder_results))
+
+            # Recycle the workers once the current pool's share has drained
+            if submitted >= recycle_after and not pending:
+                executor.shutdown(wait=True)
+                log_listener.stop()
+                executor, log_listener = start_worker_pool(num_workers, worker_settings)
+                submitted = 0
+
+        # Let workers exit normally so their log queues are flushed, then
+        # write out everything they logged before the summary
+        executor.shutdown(wait=True)
+        log_listener.stop()
+    except BaseException:
+        # Interrupted: drop queued chunks. The listener isn't stopped, as
+        # workers killed mid-record can leave its queue wedged.
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        # Close progress bar
+        if TQDM_AVAILABLE:
+            pbar.close()
+
+    for genre in sorted(genre_stats):
+        updated, unchanged, problems = genre_stats[genre]
+        logging.info(f"{genre}: {updated + unchanged + problems} files "
+                     f"({updated} updated, {unchanged} unchanged, {problems} problems)")
+
+    return total_files
 
 # ----------- MAIN PROCESSING ------------
 
@@ -342,7 +896,7 @@ def main():
 
     # Print run information
     logging.info(f"Starting genre tagging script on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    logging.info(f"Dry run: {args.dry_run}, Backup: {args.backup}")
+    logging.info(f"Dry run: {args.dry_run}, Backup: {args.backup}, Trust folder: {args.trust_folder}")
 
     # Collect directories to process
     directories = [args.managed, args.unmanaged]
@@ -354,25 +908,35 @@ def main():
     num_workers = min(args.cpu_limit, available_cpus) if args.cpu_limit else available_cpus
     logging.info(f"Using {num_workers} out of {available_cpus} available CPU cores")
 
-    # Collect all files to process with their base directory
-    files_and_args = []
-    for base_folder in directories:
-        if not os.path.isdir(base_folder):
-            logging.warning(f"Directory not found, skipping: {base_folder}")
-            continue
-
-        logging.info(f"Scanning {base_folder} ...")
-        for fpath in find_audio_files(base_folder):
-            files_and_args.append((fpath, base_folder, args.dry_run, args.backup, args.genre))
+    # Files verified on a previous run are skipped if unchanged since
+    genre_cache = None
+    if not args.no_cache:
+        genre_cache = load_genre_cache(args.cache_file)
+        logging.info(f"Loaded {len(genre_cache)} cached entries from {args.cache_file}")
 
-    if not files_and_args:
+    # Scan and tag concurrently: files are fed to the pool as they are found
+    seen_paths = set() if genre_cache is not None else None
+    folders = iter_audio_folders(directories, args.batch_size, args.genre, genre_cache, seen_paths)
+    worker_settings = (args.verbose, args.dry_run, args.backup, args.trust_folder, genre_cache is not None)
+    try:
+        total_files = process_files_in_batches(folders, worker_settings, args.batch_size, num_workers,
+                                               genre_cache)
+
+        # Only a scan that ran to the end shows which cached files are gone
+        if genre_cache is not None:
+            pruned = prune_genre_cache(genre_cache, seen_paths, directories)
+            if pruned:
+                logging.info(f"Removed {pruned} cache entries for files no longer found")
+    finally:
+        # Saved even if interrupted, so the next run resumes where this one stopped
+        if genre_cache is not None:
+            save_genre_cache(args.cache_file, genre_cache)
+
+    if not total_files:
         logging.warning("No audio files found in the specified directories.")
         return
 
-    logging.info(f"Total audio files found: {len(files_and_args)}")
-
-    # Process files in batches
-    process_files_in_batches(files_and_args, args.batch_size, num_workers)
+    logging.info(f"Total audio files processed: {total_files}")
 
     # Print summary
     if args.dry_run: